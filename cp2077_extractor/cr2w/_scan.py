@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+#
+#  _scan.py
+"""
+JIT-compiled scanning of chunk variables, used by :func:`cp2077_extractor.cr2w.utils.get_chunk_variables`.
+
+This module requires ``numba``, which is slow to import, so it is only imported when a large chunk is first parsed.
+"""
+#
+#  Copyright © 2025 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+from collections.abc import Iterator
+
+# 3rd party
+import numpy
+from numba import njit  # type: ignore[import]
+
+__all__ = ["scan_variables"]
+
+
+@njit(cache=True)
+def _scan(buf: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+	"""
+	Locate the variables in a chunk.
+
+	Returns arrays of the name indices, type indices, value offsets and value sizes.
+	Scanning only stops at the end of the buffer or at an invalid size.
+
+	:param buf: The chunk, as a :class:`numpy.ndarray` of ``uint8``.
+	"""
+
+	end = buf.size
+	max_variables = end // 8 + 1
+	name_indices = numpy.empty(max_variables, numpy.int64)
+	type_indices = numpy.empty(max_variables, numpy.int64)
+	offsets = numpy.empty(max_variables, numpy.int64)
+	sizes = numpy.empty(max_variables, numpy.int64)
+
+	pos = 1
+	count = 0
+	while pos + 8 <= end:
+		size = (
+				numpy.int64(buf[pos + 4]) | (numpy.int64(buf[pos + 5]) << 8)
+				| (numpy.int64(buf[pos + 6]) << 16) | (numpy.int64(buf[pos + 7]) << 24)
+				)
+		if size < 4:
+			break
+		name_indices[count] = numpy.int64(buf[pos]) | (numpy.int64(buf[pos + 1]) << 8)
+		type_indices[count] = numpy.int64(buf[pos + 2]) | (numpy.int64(buf[pos + 3]) << 8)
+		offsets[count] = pos + 8
+		sizes[count] = size - 4
+		pos += 4 + size
+		count += 1
+
+	return name_indices[:count], type_indices[:count], offsets[:count], sizes[:count]
+
+
+def scan_variables(chunk: bytes) -> Iterator[tuple[int, int, int, int]]:
+	"""
+	Locate the variables in a chunk.
+
+	Names and value bounds are not validated here.
+
+	:param chunk:
+
+	:returns: An iterator of tuples of each variable's name index, type index, and value start and end offsets.
+	"""
+
+	name_indices, type_indices, offsets, sizes = _scan(numpy.frombuffer(chunk, numpy.uint8))
+	return zip(name_indices.tolist(), type_indices.tolist(), offsets.tolist(), (offsets + sizes).tolist())
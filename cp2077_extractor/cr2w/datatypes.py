@@ -28,14 +28,15 @@ Classes to represent datatypes within CR2W/W2RC files.
 
 # stdlib
 import inspect
+import struct
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, TypeVar
 
 # this package
 from cp2077_extractor.cr2w import enums
-from cp2077_extractor.cr2w.utils import get_chunk_variables
-from cp2077_extractor.utils import to_snake_case
+from cp2077_extractor.cr2w.utils import get_chunk_variables, to_field_name
 
 if TYPE_CHECKING:
 	# this package
@@ -46,6 +47,7 @@ __all__ = [
 		"Chunk",
 		"STextureGroupSetup",
 		"array_rendRenderTextureBlobMipMapInfo",
+		"get_type_dispatch",
 		"handle",
 		"instantiate_type",
 		"lookup_type",
@@ -59,25 +61,34 @@ __all__ = [
 		"uint"
 		]
 
+_K = TypeVar("_K")
+
 
 class Chunk:
 
+	__slots__ = ()
+
 	@classmethod
 	def from_cr2w_kwargs(cls, kwargs: dict[bytes, Any]) -> "Chunk":
-		new_kwargs: dict[str, Any] = {
-				to_snake_case(arg_name.decode("UTF-8")): arg_value
-				for arg_name, arg_value in kwargs.items()
-				}
+		new_kwargs: dict[str, Any] = {to_field_name(arg_name): arg_value for arg_name, arg_value in kwargs.items()}
 		return cls(**new_kwargs)
 
 	@classmethod
 	def from_chunk(cls, chunk: bytes, parsing_data: "ParsingData") -> "Chunk":
-		kwargs = parse_chunk(chunk, parsing_data)
-		return cls.from_cr2w_kwargs(kwargs)
+		return cls(**_parse_variables(chunk, parsing_data, parsing_data.field_names))
+
+
+#: Compiled little-endian unsigned integer structs, keyed on their size in bytes.
+_UINT_STRUCTS = {
+		1: struct.Struct("<B"),
+		2: struct.Struct("<H"),
+		4: struct.Struct("<I"),
+		8: struct.Struct("<Q"),
+		}
 
 
 def uint(value: bytes) -> int:
-	return int.from_bytes(value, byteorder="little")
+	return _UINT_STRUCTS[len(value)].unpack(value)[0]
 
 
 def lookup_type(red_type_name: bytes) -> type:
@@ -90,33 +101,67 @@ def lookup_type(red_type_name: bytes) -> type:
 
 
 def parse_chunk(chunk: bytes, parsing_data: "ParsingData") -> dict[bytes, Any]:
+	return _parse_variables(chunk, parsing_data, parsing_data.names_list)
 
-	variables = get_chunk_variables(chunk, parsing_data.names_list)
 
-	kwargs: dict[bytes, Any] = {}
-	for (var_c_name, red_type_name, value) in variables:
-		kwargs[var_c_name] = instantiate_type(red_type_name, value, parsing_data)
+def _parse_variables(chunk: bytes, parsing_data: "ParsingData", keys: Sequence[_K]) -> dict[_K, Any]:
+	"""
+	Parse the variables in a chunk.
+
+	:param chunk:
+	:param parsing_data:
+	:param keys: The keys for the returned dictionary, indexed by the variables' name indices.
+	"""
+
+	names_list = parsing_data.names_list
+	type_dispatch = parsing_data.type_dispatch
+	variables = get_chunk_variables(chunk, names_list)
+	instantiate = _instantiate
+
+	kwargs: dict[_K, Any] = {}
+	for (name_index, type_index, value) in variables:
+		dispatch = type_dispatch[type_index]
+		if dispatch is None:
+			raise NotImplementedError(names_list[type_index])
+		kwargs[keys[name_index]] = instantiate(dispatch, names_list[type_index], value, parsing_data)
 
 	return kwargs
 
 
 def instantiate_type(red_type_name: bytes, value: bytes, parsing_data: "ParsingData") -> object:
-	var_type = lookup_type(red_type_name)
+	try:
+		dispatch = _red_type_dispatch[red_type_name]
+	except KeyError:
+		raise NotImplementedError(red_type_name) from None
 
-	if inspect.isclass(var_type) and issubclass(var_type, Enum):
-		return var_type.from_red_name(parsing_data.names_list[uint(value)])
-	elif var_type is Chunk:
-		return (red_type_name, parse_chunk(value, parsing_data))
-	elif inspect.isclass(var_type) and issubclass(var_type, Chunk):
+	return _instantiate(dispatch, red_type_name, value, parsing_data)
+
+
+def _instantiate(
+		dispatch: tuple[Any, int],
+		red_type_name: bytes,
+		value: bytes,
+		parsing_data: "ParsingData",
+		) -> object:
+	var_type, kind = dispatch
+
+	if kind == _KIND_CALLABLE:
+		return var_type(value)
+	elif kind == _KIND_CHUNK:
 		return var_type.from_chunk(value, parsing_data)
-	elif var_type in {handle, serialization_deferred_data_buffer}:
+	elif kind == _KIND_ENUM:
+		return var_type._red_name_map[parsing_data.names_list[uint(value)]]
+	elif kind == _KIND_WITH_PARSING_DATA:
 		return var_type(value, parsing_data)
-	else:
-		return var_type(value)
+	else:  # _KIND_GENERIC_CHUNK
+		return (red_type_name, parse_chunk(value, parsing_data))
 
 
 class array_rendRenderTextureBlobMipMapInfo(bytes):
 	# TODO: parse the array
+
+	__slots__ = ()
+
 	def __repr__(self) -> str:
 		return f"array:rendRenderTextureBlobMipMapInfo({super().__repr__()})"
 
@@ -124,9 +169,16 @@ class array_rendRenderTextureBlobMipMapInfo(bytes):
 
 
 def handle(handle: bytes, parsing_data: "ParsingData") -> dict[str, Any]:  # TODO: TypedDict or class
-	handle_idx = int.from_bytes(handle, "little") - 1
-	chunk = parsing_data.chunks[handle_idx]
-	return {"handle_id": handle_idx, "data": instantiate_type(chunk[1], chunk[0], parsing_data)}
+	handle_idx = uint(handle) - 1
+
+	# Handles are shared references, so each chunk only needs instantiating once.
+	try:
+		data = parsing_data.handles[handle_idx]
+	except KeyError:
+		chunk = parsing_data.chunks[handle_idx]
+		data = parsing_data.handles[handle_idx] = instantiate_type(chunk[1], chunk[0], parsing_data)
+
+	return {"handle_id": handle_idx, "data": data}
 
 
 def serialization_deferred_data_buffer(
@@ -139,7 +191,7 @@ def serialization_deferred_data_buffer(
 	return {"buffer_id": buffer_idx, "flags": buffer_info.flags, "bytes": buffer}
 
 
-@dataclass
+@dataclass(slots=True)
 class rendRenderTextureBlobTextureInfo(Chunk):
 	texture_data_size: int
 	slice_size: int
@@ -149,14 +201,14 @@ class rendRenderTextureBlobTextureInfo(Chunk):
 	type: enums.GpuWrapApieTextureType = enums.GpuWrapApieTextureType.TEXTYPE_2D
 
 
-@dataclass
+@dataclass(slots=True)
 class rendRenderTextureBlobSizeInfo(Chunk):
 	width: int
 	height: int
 	depth: int = 1
 
 
-@dataclass
+@dataclass(slots=True)
 class rendRenderTextureBlobHeader(Chunk):
 	version: int
 	size_info: rendRenderTextureBlobSizeInfo
@@ -166,13 +218,13 @@ class rendRenderTextureBlobHeader(Chunk):
 	histogram_data: list[Any] = field(default_factory=list)  # list[HistogramData]
 
 
-@dataclass
+@dataclass(slots=True)
 class rendRenderTextureBlobPC(Chunk):
 	header: rendRenderTextureBlobHeader
 	texture_data: bytes  # TODO: Type to cover this, buffer_id, & flags
 
 
-@dataclass
+@dataclass(slots=True)
 class STextureGroupSetup(Chunk):
 	compression: enums.ETextureCompression
 	is_gamma: bool
@@ -185,14 +237,14 @@ class STextureGroupSetup(Chunk):
 	raw_format: enums.ETextureRawFormat = enums.ETextureRawFormat.TRF_TrueColor
 
 
-@dataclass
+@dataclass(slots=True)
 class rendRenderTextureResource(Chunk):
 
 	# render_resource_blob_pc: handle_IRenderResourceBlob  # CHandle
 	render_resource_blob_pc: dict[bytes, Any]  # CHandle
 
 
-@dataclass
+@dataclass(slots=True)
 class CBitmapTexture(Chunk):
 	cooking_platform: enums.ECookingPlatform
 	width: int
@@ -227,4 +279,47 @@ _red_type_lookup = {
 _red_enum_list = enums.__all__[:]
 _red_enum_list.remove("REDEnum")
 for _class_name in _red_enum_list:
-	_red_type_lookup[_class_name.encode("UTF-8")] = getattr(enums, _class_name)
+	_enum = getattr(enums, _class_name)
+	# Equivalent to from_red_name, without decoding the name each time.
+	_enum._red_name_map = {name.encode("UTF-8"): member for name, member in _enum.__members__.items()}
+	_red_type_lookup[_class_name.encode("UTF-8")] = _enum
+
+# How instantiate_type creates each type
+_KIND_CALLABLE = 0
+_KIND_CHUNK = 1
+_KIND_ENUM = 2
+_KIND_WITH_PARSING_DATA = 3
+_KIND_GENERIC_CHUNK = 4
+
+
+def _classify_type(var_type: Any) -> int:
+	if var_type is Chunk:
+		return _KIND_GENERIC_CHUNK
+	elif inspect.isclass(var_type) and issubclass(var_type, Chunk):
+		return _KIND_CHUNK
+	elif inspect.isclass(var_type) and issubclass(var_type, Enum):
+		return _KIND_ENUM
+	elif var_type in {handle, serialization_deferred_data_buffer}:
+		return _KIND_WITH_PARSING_DATA
+	else:
+		return _KIND_CALLABLE
+
+
+#: Mapping of type names to the type and the way it is instantiated, classified once at import time.
+_red_type_dispatch: dict[bytes, tuple[Any, int]] = {
+		red_type_name: (var_type, _classify_type(var_type))
+		for red_type_name, var_type in _red_type_lookup.items()
+		}
+
+
+def get_type_dispatch(names_list: list[bytes]) -> list[tuple[Any, int] | None]:
+	"""
+	Resolve the names in the file's name lookup table to types, ahead of parsing the file's chunks.
+
+	:param names_list:
+
+	:returns: A list with the type for each name, and the way it is instantiated,
+		or :py:obj:`None` for names which are not known types.
+	"""
+
+	return list(map(_red_type_dispatch.get, names_list))
@@ -27,7 +27,8 @@ Classes to represent header data in CR2W/W2RC files.
 #
 
 # stdlib
-from typing import TYPE_CHECKING, Any, NamedTuple, Protocol
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any, NamedTuple, Protocol, TypeVar
 
 if TYPE_CHECKING:
 	# this package
@@ -50,6 +51,8 @@ __all__ = [
 		"Struct"
 		]
 
+_T = TypeVar("_T", bound="Struct")
+
 
 class Struct(Protocol):
 	"""
@@ -62,6 +65,14 @@ class Struct(Protocol):
 	#: The size of the struct, in bytes.
 	_size: int
 
+	@classmethod
+	def _make(cls: type[_T], iterable: Iterable[Any]) -> _T:
+		"""
+		Construct the struct from the values unpacked by :func:`struct.unpack`.
+
+		:param iterable:
+		"""
+
 
 class CR2WTable(NamedTuple):
 	offset: int
@@ -179,7 +190,7 @@ class CR2WFileInfo(NamedTuple):
 		result: list[bytes] = []  # list[ResourcePath]
 		for import_info in self.import_info:
 			# result.append((ResourcePath)StringDict[importInfo.offset]);
-			result.append(self.string_dict[import_info.offset])
+			result.append(self.string_dict[import_info.offset] or b"None")
 
 		return result
 
@@ -27,19 +27,20 @@ File IO operations.
 #
 
 # stdlib
-import binascii
 import struct
 import warnings
+import zlib
 from collections.abc import Iterator
-from typing import IO, NamedTuple, TypeVar
+from itertools import accumulate
+from typing import IO, Any, NamedTuple, TypeVar
 
 # 3rd party
 from domdf_python_tools.paths import PathPlus
 from domdf_python_tools.typing import PathLike
 
 # this package
-from cp2077_extractor.cr2w.datatypes import Chunk, lookup_type
-from cp2077_extractor.cr2w.utils import get_names_list
+from cp2077_extractor.cr2w.datatypes import Chunk, get_type_dispatch, lookup_type
+from cp2077_extractor.cr2w.utils import get_names_list, to_field_name
 
 # this package
 from .header_structs import (
@@ -63,6 +64,59 @@ __all__ = ["read_c_name", "read_chunk", "read_file_info", "read_struct", "read_t
 
 _S = TypeVar("_S", bound=Struct)
 
+_U16 = struct.Struct("<H")
+
+#: The types of tables [1-6]. Table 0 is the names block and tables [7-9] are not used in cr2w so far.
+_TABLE_TYPES = (CR2WNameInfo, CR2WImportInfo, CR2WPropertyInfo, CR2WExportInfo, CR2WBufferInfo, CR2WEmbeddedInfo)
+
+#: Compiled :class:`struct.Struct` objects for each struct type, keyed on the type.
+_STRUCT_CACHE: dict[type, struct.Struct] = {}
+
+
+def _get_struct(struct_type: type[Struct]) -> struct.Struct:
+	"""
+	Returns the compiled :class:`struct.Struct` for the given struct type, compiling it on first use.
+
+	:param struct_type:
+	"""
+
+	try:
+		return _STRUCT_CACHE[struct_type]
+	except KeyError:
+		compiled = _STRUCT_CACHE[struct_type] = struct.Struct(struct_type._struct_format)
+		return compiled
+
+
+def _unpack_struct(buffer: bytes, offset: int, struct_type: type[_S]) -> tuple[_S, int]:
+	"""
+	Unpack the given struct from ``buffer``, starting at ``offset``.
+
+	:param buffer:
+	:param offset:
+	:param struct_type:
+
+	:returns: The struct, and the offset immediately after it.
+	"""
+
+	compiled = _get_struct(struct_type)
+	return struct_type._make(compiled.unpack_from(buffer, offset)), offset + compiled.size
+
+
+def _unpack_table(table_bytes: bytes | memoryview, table_struct: type[_S], header: CR2WTable) -> Iterator[_S]:
+	"""
+	Unpack a table of the given type, after checking its CRC32.
+
+	:param table_bytes: The raw data of the table.
+	:param table_struct:
+	:param header:
+
+	:returns: An iterator over instances of ``table_struct``.
+	"""
+
+	crc32 = zlib.crc32(table_bytes)
+	assert crc32 == header.crc32, (crc32, header.crc32)
+	return map(table_struct._make, _get_struct(table_struct).iter_unpack(table_bytes))
+
 
 def read_tables(fp: IO, table_struct: type[_S], header: CR2WTable) -> Iterator[_S]:
 	"""
@@ -75,12 +129,7 @@ def read_tables(fp: IO, table_struct: type[_S], header: CR2WTable) -> Iterator[_
 	:returns: An iterator over instances of ``table_struct``.
 	"""
 
-	table_bytes = fp.read(table_struct._size * header.item_count)
-	crc32 = binascii.crc32(table_bytes)
-	assert crc32 == header.crc32, (crc32, header.crc32)
-	for idx in range(header.item_count):
-		chunk = table_bytes[0 + (idx * table_struct._size):table_struct._size + (idx * table_struct._size)]
-		yield table_struct(*struct.unpack(table_struct._struct_format, chunk))
+	yield from _unpack_table(fp.read(table_struct._size * header.item_count), table_struct, header)
 
 
 def read_c_name(fp: IO, names_list: list[bytes]) -> bytes:
@@ -93,7 +142,7 @@ def read_c_name(fp: IO, names_list: list[bytes]) -> bytes:
 	:param names_list: Ordered list of names used in the file, for lookups.
 	"""
 
-	string_index = struct.unpack("<H", fp.read(2))[0]
+	string_index = _U16.unpack(fp.read(2))[0]
 	assert string_index < len(names_list)
 	c_name = names_list[string_index]
 	assert c_name
@@ -109,7 +158,7 @@ def read_struct(fp: IO, struct_type: type[_S]) -> _S:
 	:param struct_type:
 	"""
 
-	return struct_type(*struct.unpack(struct_type._struct_format, fp.read(struct_type._size)))
+	return struct_type._make(_get_struct(struct_type).unpack(fp.read(struct_type._size)))
 
 
 def read_file_info(fp: IO) -> CR2WFileInfo:
@@ -119,56 +168,50 @@ def read_file_info(fp: IO) -> CR2WFileInfo:
 	:param fp:
 	"""
 
-	magic = fp.read(4)
-	assert magic == b"CR2W"
+	# The file header and table headers are a fixed size.
+	buffer = fp.read(4 + CR2WFileHeader._size + CR2WTable._size * 10)
+	assert buffer[:4] == b"CR2W"
 
 	# File Header
-	file_header = read_struct(fp, CR2WFileHeader)  # type: ignore[type-var]
+	file_header, pos = _unpack_struct(buffer, 4, CR2WFileHeader)  # type: ignore[type-var]
 
 	if file_header.version > 195 or file_header.version < 163:
 		raise ValueError("Unsupported Version")
 
 	# Tables [7-9] are not used in cr2w so far.
-	table_headers = [read_struct(fp, CR2WTable) for _ in range(10)]  # type: ignore[type-var]
-
-	# Read strings - block 1 (index 0)
-	assert fp.tell() == table_headers[0].offset, (fp.tell(), table_headers[0].offset)
-
-	string_dict: dict[int, bytes] = {}
-	while fp.tell() < (table_headers[0].offset + table_headers[0].item_count):
-		pos = fp.tell() - table_headers[0].offset
-		string = b''
-		while True:
-			char = fp.read(1)
-			if char == b"\0":
-				break
-			string += (char)
-		if not string:
-			string = b"None"
-		string_dict[pos] = string
+	table_header_struct = _get_struct(CR2WTable)  # type: ignore[arg-type]
+	table_headers = list(map(CR2WTable._make, table_header_struct.iter_unpack(buffer[pos:])))
+
+	# Read the strings (block 1, index 0) and tables [1-6] in one go.
+	assert len(buffer) == table_headers[0].offset, (len(buffer), table_headers[0].offset)
+	metadata_end = table_headers[0].offset + table_headers[0].item_count
+	for table_struct, table_header in zip(_TABLE_TYPES, table_headers[1:]):
+		table_end = table_header.offset + table_struct._size * table_header.item_count  # type: ignore[attr-defined]
+		metadata_end = max(metadata_end, table_end)
+	buffer += fp.read(metadata_end - len(buffer))
+	view = memoryview(buffer)
+
+	def unpack_table(table_struct: type[_S], header: CR2WTable) -> list[_S]:
+		table_bytes = view[header.offset:header.offset + table_struct._size * header.item_count]
+		return list(_unpack_table(table_bytes, table_struct, header))
+
+	names_block = buffer[table_headers[0].offset:table_headers[0].offset + table_headers[0].item_count]
+	# Each string is null-terminated, so the final element of the split is the empty remainder.
+	strings = names_block.split(b"\0")[:-1]
+	string_dict: dict[int, bytes] = dict(zip(accumulate((len(string) + 1 for string in strings), initial=0), strings))
 
 	# Read the other tables
-	name_info: list[CR2WNameInfo] = list(read_tables(fp, CR2WNameInfo, table_headers[1]))  # type: ignore[type-var]
-	import_info: list[CR2WImportInfo] = list(
-			read_tables(fp, CR2WImportInfo, table_headers[2])  # type: ignore[type-var]
-			)
-	property_info: list[CR2WPropertyInfo] = list(
-			read_tables(fp, CR2WPropertyInfo, table_headers[3])  # type: ignore[type-var]
-			)
-	export_info: list[CR2WExportInfo] = list(
-			read_tables(fp, CR2WExportInfo, table_headers[4])  # type: ignore[type-var]
-			)
-	buffer_info: list[CR2WBufferInfo] = list(
-			read_tables(fp, CR2WBufferInfo, table_headers[5])  # type: ignore[type-var]
-			)
-	embedded_info: list[CR2WEmbeddedInfo] = list(
-			read_tables(fp, CR2WEmbeddedInfo, table_headers[6])  # type: ignore[type-var]
-			)
+	name_info: list[CR2WNameInfo] = unpack_table(CR2WNameInfo, table_headers[1])  # type: ignore[type-var]
+	import_info: list[CR2WImportInfo] = unpack_table(CR2WImportInfo, table_headers[2])  # type: ignore[type-var]
+	property_info: list[CR2WPropertyInfo] = unpack_table(CR2WPropertyInfo, table_headers[3])  # type: ignore[type-var]
+	export_info: list[CR2WExportInfo] = unpack_table(CR2WExportInfo, table_headers[4])  # type: ignore[type-var]
+	buffer_info: list[CR2WBufferInfo] = unpack_table(CR2WBufferInfo, table_headers[5])  # type: ignore[type-var]
+	embedded_info: list[CR2WEmbeddedInfo] = unpack_table(CR2WEmbeddedInfo, table_headers[6])  # type: ignore[type-var]
 
 	_names_list: list[bytes] = []
 	for a_name_info in name_info:
 		assert a_name_info.offset in string_dict
-		_names_list.append(string_dict[a_name_info.offset])
+		_names_list.append(string_dict[a_name_info.offset] or b"None")
 
 	_imports_list = []
 	for an_import_info in import_info:
@@ -204,10 +247,8 @@ def read_chunk(fp: IO, chunk_index: int, file_info: CR2WFileInfo) -> tuple[bytes
 	:returns: A tuple of the raw chunk data and the chunk's datatype.
 	"""
 
-	names_list = get_names_list(file_info)
-
 	info = file_info.export_info[chunk_index]
-	red_type_name = names_list[info.class_name]
+	red_type_name = file_info.string_dict[file_info.name_info[info.class_name].offset] or b"None"
 
 	assert fp.tell() == info.data_offset
 	data = fp.read(info.data_size)
@@ -226,7 +267,7 @@ def read_buffer(fp: IO, info: CR2WBufferInfo) -> bytes:
 	# TODO: decompress buffer if it is compressed with oodle
 	assert buffer[:4] != b"KARK"
 	# TODO: check crc32 (figure out what the input data is)
-	# crc32 = binascii.crc32(buffer)
+	# crc32 = zlib.crc32(buffer)
 	# assert crc32 == info.crc32, (crc32, info.crc32)
 	# buffer_data.append((info.buffer_info[i], buffer))
 	return buffer
@@ -246,6 +287,15 @@ class ParsingData(NamedTuple):
 	#: List of tuples of the raw buffer data and the buffer metadata
 	buffers: list[bytes, CR2WBufferInfo]
 
+	#: The entries in ``names_list`` converted to ``snake_case``, for use as field names.
+	field_names: list[str]
+
+	#: The types of the entries in ``names_list``, as given by :func:`~.get_type_dispatch`.
+	type_dispatch: list[tuple[Any, int] | None]
+
+	#: Chunks which have been instantiated through handles, keyed on the chunk index.
+	handles: dict[int, Any]
+
 
 def parse_cr2w_file(filename: PathLike) -> CR2WFile:
 
@@ -281,7 +331,15 @@ def parse_cr2w_file(filename: PathLike) -> CR2WFile:
 			buffer_info = info.buffer_info[i]
 			buffer_data.append((read_buffer(fp, buffer_info), buffer_info))
 
-		parsing_data = ParsingData(get_names_list(info), chunks, buffer_data)
+		names_list = get_names_list(info)
+		parsing_data = ParsingData(
+				names_list,
+				chunks,
+				buffer_data,
+				field_names=list(map(to_field_name, names_list)),
+				type_dispatch=get_type_dispatch(names_list),
+				handles={},
+				)
 
 		root_chunk_type = chunks[0][1]
 		var_type = lookup_type(root_chunk_type)
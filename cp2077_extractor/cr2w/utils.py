@@ -28,13 +28,20 @@ Utility functions.
 
 # stdlib
 import struct
-from io import BytesIO
-from typing import Any
+from collections.abc import Callable, Iterable, Iterator
+from functools import lru_cache
 
 # this package
 from cp2077_extractor.cr2w.header_structs import CR2WFileInfo
+from cp2077_extractor.utils import to_snake_case
 
-__all__ = ["get_chunk_variables", "get_names_list"]
+__all__ = ["get_chunk_variables", "get_names_list", "to_field_name"]
+
+#: Name index, type index and size (including the size field itself) preceding each variable's value.
+_VARIABLE_HEADER = struct.Struct("<HHI")
+
+#: Chunks smaller than this (in bytes) are parsed in pure Python, as the JIT call overhead outweighs the gain.
+_JIT_MIN_CHUNK_SIZE = 1024
 
 
 def get_names_list(file_info: CR2WFileInfo) -> list[bytes]:
@@ -47,29 +54,102 @@ def get_names_list(file_info: CR2WFileInfo) -> list[bytes]:
 	_names_list: list[bytes] = []
 	for a_name_info in file_info.name_info:
 		assert a_name_info.offset in file_info.string_dict
-		_names_list.append(file_info.string_dict[a_name_info.offset])
+		_names_list.append(file_info.string_dict[a_name_info.offset] or b"None")
 
 	return _names_list
 
 
-def get_chunk_variables(chunk: bytes, names_list: list[bytes]) -> list[tuple[bytes, bytes, Any]]:
+@lru_cache(maxsize=None)
+def to_field_name(name: bytes) -> str:
+	"""
+	Convert a name from the file's names list into a ``snake_case`` field name.
+
+	Names are heavily repeated within and between files, so the result is cached.
+
+	:param name:
+	"""
+
+	return to_snake_case(name.decode("UTF-8"))
+
+
+@lru_cache(maxsize=None)
+def _get_scanner() -> Callable[[bytes], Iterable[tuple[int, int, int, int]]] | None:
+	"""
+	Returns the JIT-compiled variable scanner, or :py:obj:`None` if ``numba`` is not installed.
+
+	``numba`` is slow to import, so this is deferred until a chunk large enough to benefit is parsed.
+	"""
+
+	try:
+		# this package
+		from cp2077_extractor.cr2w._scan import scan_variables
+	except ImportError:
+		return None
+
+	return scan_variables
+
+
+def _iter_variable_headers(chunk: bytes) -> Iterator[tuple[int, int, int, int]]:
+	"""
+	Locate the variables in a chunk, in pure Python.
+
+	Names and value bounds are not validated here.
 
-	# this package
-	from cp2077_extractor.cr2w.io import read_c_name
+	:param chunk:
 
-	variables: list[tuple[bytes, bytes, Any]] = []
-	buffer = BytesIO(chunk)
-	zero = buffer.read(1)
+	:returns: An iterator of tuples of each variable's name index, type index, and value start and end offsets.
+	"""
+
+	unpack_header = _VARIABLE_HEADER.unpack_from
+	header_size = _VARIABLE_HEADER.size
+	chunk_length = len(chunk)
+	pos = 1
+
+	while pos + header_size <= chunk_length:
+		name_index, type_index, size = unpack_header(chunk, pos)
+		if size < 4:
+			return
+
+		pos += header_size
+		end = pos + size - 4
+		yield name_index, type_index, pos, end
+		pos = end
+
+
+def get_chunk_variables(chunk: bytes, names_list: list[bytes]) -> list[tuple[int, int, bytes]]:
+	"""
+	Returns the variables in the chunk.
+
+	:param chunk:
+	:param names_list: Ordered list of names used in the file, for validating name indices.
+
+	:returns: A list of tuples of the index of the variable's name in ``names_list``,
+		the index of its type name, and its raw value.
+	"""
+
+	zero = chunk[:1]
 	assert zero == b"\0", f"Tried parsing a CVariable: zero read {zero}."
-	while buffer.tell() < len(chunk) - 1:
-		try:
-			var_c_name = read_c_name(buffer, names_list)
-			red_type_name = read_c_name(buffer, names_list)
-			size = struct.unpack("<I", buffer.read(4))[0] - 4
-			value = buffer.read(size)
-			variables.append((var_c_name, red_type_name, value))
-		except:
-			# Run out of buffer
+
+	chunk_length = len(chunk)
+	headers: Iterable[tuple[int, int, int, int]] = _iter_variable_headers(chunk)
+	if chunk_length >= _JIT_MIN_CHUNK_SIZE:
+		scanner = _get_scanner()
+		if scanner is not None:
+			headers = scanner(chunk)
+
+	num_names = len(names_list)
+	variables: list[tuple[int, int, bytes]] = []
+	append = variables.append
+
+	for name_index, type_index, start, end in headers:
+		if name_index >= num_names or type_index >= num_names:
+			break
+		if names_list[name_index] == b"None" or names_list[type_index] == b"None":
 			break
+		if end > chunk_length:
+			# Truncated value
+			break
+
+		append((name_index, type_index, chunk[start:end]))
 
 	return variables
@@ -27,18 +27,26 @@ Track metadata.
 #
 
 # stdlib
-from collections.abc import Mapping, Sequence
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from types import MappingProxyType
-from typing import NamedTuple
+from typing import Any
 
 # 3rd party
 from domdf_python_tools.typing import PathLike
-from mutagen.id3 import COMM, ID3, TALB, TCMP, TCOM, TDRC, TIT2, TOA, TPE1, TPE2, Encoding
+from mutagen.id3 import COMM, ID3, TALB, TCMP, TCOM, TDRC, TIT2, TOPE, TPE1, TPE2, Encoding
 
-__all__ = ["Track"]
+__all__ = ["Track", "apply_id3_batch"]
 
+_UTF8 = Encoding.UTF8
 
-class Track(NamedTuple):
+#: The ID3 frames set by :meth:`Track.set_id3_metadata`, in order.
+_FRAMES = (TPE1, TIT2, TOPE, TCOM, TALB, TCMP, TDRC, TPE2, COMM)
+
+
+@dataclass(slots=True, frozen=True)
+class Track:
 	"""
 	Represents an audio track played on the radio etc.
 	"""
@@ -51,7 +59,19 @@ class Track(NamedTuple):
 	real_artist: str = ''
 
 	#: Mapping of WEM file names to usage.
-	other_uses: Mapping[int, str] = MappingProxyType({})
+	other_uses: Mapping[int, str] = field(default_factory=lambda: MappingProxyType({}))
+
+	def __reduce__(self) -> tuple[Callable[..., "Track"], tuple[Any, ...]]:
+		# mappingproxy objects can't be pickled, which is needed to send tracks to worker processes.
+		return _unpickle_track, (
+				self.artist,
+				self.title,
+				self.wem_name,
+				self.extra_ids,
+				self.writer,
+				self.real_artist,
+				dict(self.other_uses),
+				)
 
 	@property
 	def filename_stub(self) -> str:
@@ -70,14 +90,59 @@ class Track(NamedTuple):
 		"""
 
 		tags = ID3(mp3_filename)
-		tags.add(TPE1(encoding=Encoding.UTF8, text=self.artist))
-		tags.add(TIT2(encoding=Encoding.UTF8, text=self.title))
-		tags.add(TOA(encoding=Encoding.UTF8, text=self.real_artist))
-		tags.add(TCOM(encoding=Encoding.UTF8, text=self.writer))
-		tags.add(TALB(encoding=Encoding.UTF8, text=station))
-		tags.add(TCMP(encoding=Encoding.UTF8, text='1'))
-		tags.add(TDRC(encoding=Encoding.UTF8, text="2023"))
-		tags.add(TPE2(encoding=Encoding.UTF8, text="Various Artists"))
-		tags.add(COMM(encoding=Encoding.UTF8, text="From Cyberpunk 2077"))
-		# TODO: only save if changes made from tags read in.
-		tags.save(mp3_filename)
+		texts = (
+				self.artist,
+				self.title,
+				self.real_artist,
+				self.writer,
+				station,
+				'1',
+				"2023",
+				"Various Artists",
+				"From Cyberpunk 2077",
+				)
+
+		# Only write the file if a tag differs from what is already there (e.g. when re-run).
+		# Frames with empty text aren't written, so a missing frame is equivalent to an empty one.
+		dirty = False
+		for frame_type, text in zip(_FRAMES, texts):
+			frame = frame_type(encoding=_UTF8, text=text)
+			existing = tags.get(frame.HashKey)
+			if (existing.text if existing is not None else ['']) != frame.text:  # type: ignore[attr-defined]
+				tags.add(frame)
+				dirty = True
+
+		if dirty:
+			tags.save(mp3_filename)
+
+
+def _unpickle_track(
+		artist: str,
+		title: str,
+		wem_name: int,
+		extra_ids: Sequence[int],
+		writer: str,
+		real_artist: str,
+		other_uses: dict[int, str],
+		) -> Track:
+	return Track(artist, title, wem_name, extra_ids, writer, real_artist, MappingProxyType(other_uses))
+
+
+def _apply_one(item: tuple[Track, PathLike, str]) -> None:
+	track, mp3_filename, station = item
+	track.set_id3_metadata(mp3_filename, station)
+
+
+def apply_id3_batch(items: Iterable[tuple[Track, PathLike, str]]) -> None:
+	"""
+	Set ID3 tags on many files in parallel, using a pool of worker processes.
+
+	:param items: Tuples of the track, the file to set metadata on, and the name of the radio station.
+
+	.. seealso:: :meth:`Track.set_id3_metadata`
+	"""
+
+	with ProcessPoolExecutor() as executor:
+		# Consume the results so that any exceptions are raised here.
+		for _ in executor.map(_apply_one, items, chunksize=16):
+			pass
@@ -27,100 +27,173 @@ General utility functions.
 #
 
 # stdlib
-import itertools
 import os
 import pprint
 import re
 import subprocess
 from collections import Counter
-from typing import Any
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING
 
 # 3rd party
-import regex as re
-import sox  # type: ignore[import]
 from domdf_python_tools.paths import PathPlus
 
+if TYPE_CHECKING:
+	# this package
+	from cp2077_extractor.track import Track
+
 __all__ = [
 		"prepare_ids",
 		"remove_extra_files",
 		"set_id_filename_in_directory",
 		"to_snake_case",
-		"transcode_file"
+		"transcode_all",
+		"transcode_file",
 		]
 
+# Metadata printed by ``vgmstream-cli -m``
+_sample_rate_re = re.compile(rb"^sample rate: (\d+) Hz", flags=re.MULTILINE)
+_play_duration_re = re.compile(rb"^play duration: (\d+) samples", flags=re.MULTILINE)
+
 
-def prepare_ids(radio_stations: dict[str, Any], *other_ids) -> tuple[
+def prepare_ids(radio_stations: Mapping[str, Mapping[int, "Track"]], *other_ids) -> tuple[
 		set[int],
 		set[int],
 		set[int],
 		]:
-	target_file_ids: set[int] = set(itertools.chain(*(station.keys() for station in radio_stations.values())))
+	target_file_ids: set[int] = set()
 	extra_file_ids: set[int] = set()
 	for station in radio_stations.values():
-		for track_data in station.values():
-			try:
-				extra_file_ids.update(track_data[3])
-			except:
-				print(track_data)
-				raise
+		target_file_ids.update(station)
+		for track in station.values():
+			extra_file_ids.update(track.extra_ids)
 
 	all_ids: list[int] = [int(i) for i in (*target_file_ids, *extra_file_ids) if i]
 	for id_set in other_ids:
 		all_ids.extend(map(int, id_set))
 
-	res = {num: freq for num, freq in Counter(all_ids).items() if freq > 1}
-	if res:
+	unique_ids = set(all_ids)
+	if len(unique_ids) != len(all_ids):
+		# Only count frequencies when there are duplicates to report.
+		res = {num: freq for num, freq in Counter(all_ids).items() if freq > 1}
 		raise ValueError(f"Error: duplicated IDs (with frequency)\n{pprint.pformat(res)}")
 
-	return target_file_ids, extra_file_ids, set(all_ids)
+	return target_file_ids, extra_file_ids, unique_ids
 
 
 def transcode_file(
 		wem_filename: PathPlus,
 		mp3_filename: PathPlus,
 		length_range: tuple[int, int],
+		vgmstream_cli: str = "./vgmstream-cli",
 		) -> None:
 	"""
 	Transcode a WWise ``.wem`` file to mp3 at 256kbps.
 
 	:param wem_filename:
 	:param mp3_filename:
-	:param length_range: Files with durations in seconds outside this range will be skipped.
+	:param length_range: Files with durations in seconds outside this range will be skipped,
+		as will files whose duration can't be determined.
+	:param vgmstream_cli: The path to the ``vgmstream-cli`` executable.
 	"""
 
-	ogg_filename = wem_filename.with_suffix(".ogg")
-
-	wem_meta = subprocess.check_output(["./vgmstream-cli", "-m", wem_filename]).decode("UTF-8")
-	m = re.match(r": \d+ samples \((.*) seconds\)", wem_meta.split("play duration", 1)[1])
-	if m:
-		length_mins, length_secs = map(float, m.group(1).split(':'))
-		length = length_mins * 60 + length_secs
-		if length < length_range[0] or length > length_range[1]:
-			# print("Skip wem; too short or too long")
+	# Skip files already transcoded on a previous run.
+	try:
+		mp3_stat = mp3_filename.stat()
+	except FileNotFoundError:
+		pass
+	else:
+		if mp3_stat.st_size and mp3_stat.st_mtime >= wem_filename.stat().st_mtime:
 			return
 
+	wem_meta = subprocess.check_output([vgmstream_cli, "-m", wem_filename])
+	sample_rate_m = _sample_rate_re.search(wem_meta)
+	samples_m = _play_duration_re.search(wem_meta)
+	if sample_rate_m is None or samples_m is None:
+		# The length can't be checked, so don't transcode a file that may be outside the range.
+		print("Skip wem; duration not found in vgmstream-cli metadata:", wem_filename)
+		return
+
+	# Compare in samples to avoid rounding the duration.
+	sample_rate = int(sample_rate_m.group(1))
+	samples = int(samples_m.group(1))
+	if samples < length_range[0] * sample_rate or samples > length_range[1] * sample_rate:
+		# print("Skip wem; too short or too long")
+		return
+
 	print(wem_filename, "->", mp3_filename)
-	# TODO: subprocess
-	os.system(f"./vgmstream-cli -o {ogg_filename} {wem_filename}")
-	length = sox.file_info.duration(ogg_filename)
-	if length_range[1] >= length >= length_range[0]:
-		subprocess.check_output([
-				"ffmpeg",
-				"-i",
-				ogg_filename,
-				"-c:a",
-				"libmp3lame",
-				"-b:a",
-				"256k",
-				mp3_filename,
-				])
-	# else:
-	# 	print("Skip ogg; too short or too long")
+
+	# Encode to a temporary file and only move it into place once both processes succeed,
+	# so a failed run can't leave a partial mp3 that later runs would treat as up to date.
+	part_filename = mp3_filename.with_name(mp3_filename.name + ".part")
+
+	try:
+		# Stream the decoded audio straight into ffmpeg rather than going via an intermediate file.
+		with subprocess.Popen([vgmstream_cli, "-p", wem_filename], stdout=subprocess.PIPE) as decoder:
+			subprocess.check_output(
+					[
+							"ffmpeg",
+							"-y",
+							"-i",
+							"pipe:0",
+							"-c:a",
+							"libmp3lame",
+							"-b:a",
+							"256k",
+							"-f",
+							"mp3",
+							part_filename,
+							],
+					stdin=decoder.stdout,
+					)
+
+		if decoder.returncode:
+			raise subprocess.CalledProcessError(decoder.returncode, decoder.args)
+
+		os.replace(part_filename, mp3_filename)
+
+	finally:
+		part_filename.unlink(missing_ok=True)
+
+
+def _transcode_one(item: tuple[PathPlus, PathPlus, tuple[int, int]], vgmstream_cli: str) -> None:
+	transcode_file(*item, vgmstream_cli=vgmstream_cli)
+
+
+def transcode_all(files: Iterable[tuple[PathPlus, PathPlus, tuple[int, int]]]) -> None:
+	"""
+	Transcode many WWise ``.wem`` files to mp3 in parallel, using a pool of worker processes.
+
+	:param files: Tuples of the ``.wem`` file, the mp3 file to create, and the range of durations to transcode.
+
+	.. seealso:: :func:`~.transcode_file`
+	"""
+
+	# Resolved here as the workers' working directory isn't guaranteed to match.
+	vgmstream_cli = os.path.abspath("vgmstream-cli")
+
+	with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, 16)) as executor:
+		# Consume the results so that any exceptions are raised here.
+		for _ in executor.map(partial(_transcode_one, vgmstream_cli=vgmstream_cli), files, chunksize=4):
+			pass
 
 
 def remove_extra_files(directory: PathPlus, target_ids: set[int]) -> None:
-	for file_id in {int(x.stem) for x in directory.iterdir()} - target_ids:
-		directory.joinpath(str(file_id) + ".mp3").unlink()
+	with os.scandir(directory) as it:
+		for entry in it:
+			stem, suffix = os.path.splitext(entry.name)
+			if suffix != ".mp3":
+				continue
+
+			try:
+				file_id = int(stem)
+			except ValueError:
+				continue
+
+			if file_id not in target_ids:
+				os.unlink(entry.path)
 
 
 def set_id_filename_in_directory(
@@ -128,22 +201,27 @@ def set_id_filename_in_directory(
 		mp3_filename: PathPlus,
 		file_id: str,
 		) -> PathPlus:
-	new_filename = directory.joinpath(str(file_id) + ".mp3")
-	if mp3_filename.is_file():
+	new_filename = directory.joinpath(f"{file_id}.mp3")
+	if mp3_filename == new_filename:
+		return new_filename
+
+	try:
 		mp3_filename.rename(new_filename)
+	except FileNotFoundError:
+		pass
+
 	return new_filename
 
 
-_case_boundary_re = re.compile("(\\p{Ll})(\\p{Lu})")
-_single_letters_re = re.compile("(\\p{Lu}|\\p{N})(\\p{Lu})(\\p{Ll})")
+# Names in CR2W files are ASCII, so the Unicode categories VSCode uses can be narrowed.
+_case_boundary_re = re.compile("([a-z])([A-Z])")
+_single_letters_re = re.compile("([A-Z0-9])([A-Z])([a-z])")
 
 
 def to_snake_case(value: str):
 	# Matches VSCode behaviour
-	case_boundary = _case_boundary_re.findall(value)
-	single_letters = _single_letters_re.findall(value)
-	if not case_boundary and not single_letters:
+	if _case_boundary_re.search(value) is None and _single_letters_re.search(value) is None:
 		return value
 	value = _case_boundary_re.sub(r"\1_\2", value)
-	value = _case_boundary_re.sub(r"\1_\2\3", value)
+	value = _single_letters_re.sub(r"\1_\2\3", value)
 	return value.lower()